@@ -1,14 +1,32 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .routes import Inventory, Sales
+from .utils.database import ensure_indexes
+from .utils.sale_writer import sale_writer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(docs_url="/home", include_in_schema=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes()
+    sale_writer.start()
+    yield
+    await sale_writer.stop()
+
+
+app = FastAPI(
+    lifespan=lifespan,
+    docs_url="/home",
+    include_in_schema=True,
+    default_response_class=ORJSONResponse,
+)
 
 origins: list[str] = ["*"]
 app.add_middleware(
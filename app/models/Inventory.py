@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Optional, Union
 
-from pydantic import BaseModel
+import msgspec
 
 """
 A data model for creating an inventory.
@@ -11,46 +11,22 @@ Attributes:
 """
 
 
-class InventoryCreate(BaseModel):
+class InventoryCreate(msgspec.Struct):
     Products: str
     Quantity: int
 
 
 """
-A data model representing an inventory in the database.
+A data model for partially updating an inventory.
 
-This class inherits from `InventoryCreate` and includes additional attributes `_id`, `Products`, and `Quantity`.
+Fields left out of the request body stay `UNSET` and are not written.
 
 Attributes:
-    _id (str): The ID of the inventory in the database.
-    Products (str): The name of the products in the inventory.
-    Quantity (int): The quantity of the products in the inventory.
-"""
-
-
-class InventoryUpdate(BaseModel):
-    Products: Optional[str] = None
-    Quantity: Optional[int] = None
-
-
-class InventoryInDB(InventoryCreate):
-    _id: str
-    Products: str
-    Quantity: int
-
-
-"""
-A data model representing an inventory.
-
-This class inherits from `InventoryInDB` and includes a nested `Config` class with the `orm_mode` attribute set to True.
-
-Attributes:
-    None
+    Products (str, optional): The new name of the products in the inventory.
+    Quantity (int, optional): The new quantity of the products in the inventory.
 """
 
 
-class Inventory(InventoryInDB):
-    pass
-
-    class Config:
-        orm_mode = True
+class InventoryUpdate(msgspec.Struct):
+    Products: Union[Optional[str], msgspec.UnsetType] = msgspec.UNSET
+    Quantity: Union[Optional[int], msgspec.UnsetType] = msgspec.UNSET
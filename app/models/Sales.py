@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+import msgspec
 
 """
 A data model representing a sale.
@@ -26,7 +26,7 @@ Attributes:
 """
 
 
-class Sale(BaseModel):
+class Sale(msgspec.Struct):
     invoice_id: str
     branch: str
     city: str
@@ -50,11 +50,11 @@ class SalesResponseModel(Sale):
     pass
 
 
-class DateRangeInput(BaseModel):
+class DateRangeInput(msgspec.Struct):
     start_date: datetime
     end_date: datetime
 
 
-class MonthYearInput(BaseModel):
+class MonthYearInput(msgspec.Struct):
     month: int
     year: int
@@ -1,36 +1,65 @@
-import logging
-
+import msgspec
 from bson import ObjectId
-from fastapi import APIRouter
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import ORJSONResponse
+from pymongo.errors import DuplicateKeyError, PyMongoError
 
-from ..models.Inventory import Inventory, InventoryCreate, InventoryUpdate
+from ..models.Inventory import InventoryCreate, InventoryUpdate
 from ..utils.database import inventory_collection
 from ..utils.error_handling import ErrorHandling, InventoryErrorHandler
-
-logger = logging.getLogger(__name__)
+from ..utils.request_body import msgspec_body, msgspec_body_openapi
 
 router = APIRouter()
 error_handler = ErrorHandling()
 
+encoder = msgspec.json.Encoder()
+
+inventory_projection = {
+    "_id": {"$toString": "$_id"},
+    **{field: 1 for field in InventoryCreate.__struct_fields__},
+}
+
+"""
+Parse the `item_id` path parameter into an `ObjectId`.
+
+Args:
+    item_id (str): The ID of the inventory item.
+
+Returns:
+    The `ObjectId` for the item.
+
+Raises:
+    InvalidIdError: If `item_id` is not a valid ObjectId.
+"""
+
+
+async def get_object_id(item_id: str) -> ObjectId:
+    try:
+        return ObjectId(item_id)
+    except InvalidId:
+        raise error_handler.handle_invalid_id_error("Item")
+
+
 """
 Get the inventory data.
 
 Returns:
-    A list of `Inventory` objects representing the inventory data.
+    A list of inventory documents with `_id` rendered as a string.
 
 Raises:
     InternalServerError: If an error occurs while retrieving the inventory data.
 """
 
 
-@router.get("/inventory", response_model=list[Inventory])
-async def get_inventory() -> list[Inventory]:
+@router.get("/inventory", response_model=None)
+async def get_inventory() -> ORJSONResponse:
     try:
-        inventory_data = await inventory_collection.find().to_list(100)
-        for item in inventory_data:
-            item["_id"] = str(item["_id"])
-        return inventory_data
-    except Exception as e:
+        inventory_cursor = await inventory_collection.aggregate(
+            [{"$limit": 100}, {"$project": inventory_projection}]
+        )
+        return ORJSONResponse(await inventory_cursor.to_list(None))
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
@@ -45,8 +74,8 @@ Raises:
 """
 
 
-@router.get("/inventory/low_quantity_warning", response_model=dict)
-async def check_low_quantity_warning() -> dict:
+@router.get("/inventory/low_quantity_warning", response_model=None)
+async def check_low_quantity_warning() -> ORJSONResponse:
     low_quantity_items = await inventory_collection.find(
         {"Quantity": {"$lt": 10}}
     ).to_list(length=100)
@@ -61,7 +90,7 @@ async def check_low_quantity_warning() -> dict:
             item["Quantity"], item["Products"]
         )
 
-    return {"low_quantity_items": warning_messages}
+    return ORJSONResponse({"low_quantity_items": warning_messages})
 
 
 """
@@ -75,21 +104,32 @@ Raises:
 """
 
 
-@router.get("/inventory/stats", response_model=dict)
-async def get_inventory_stats() -> dict:
+@router.get("/inventory/stats", response_model=None)
+async def get_inventory_stats() -> ORJSONResponse:
     try:
-        total_items = await inventory_collection.count_documents({})
-        total_quantity = await inventory_collection.aggregate(
-            [{"$group": {"_id": None, "total_quantity": {"$sum": "$Quantity"}}}]
-        ).to_list(1)
-
-        return {
-            "total_items": total_items,
-            "total_quantity": total_quantity[0]["total_quantity"]
-            if total_quantity
-            else 0,
-        }
-    except Exception as e:
+        stats_cursor = await inventory_collection.aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": None,
+                        # Exact count from the same pass that sums the
+                        # quantity; cheaper than a separate
+                        # estimated_document_count() round-trip
+                        "total_items": {"$sum": 1},
+                        "total_quantity": {"$sum": "$Quantity"},
+                    }
+                }
+            ]
+        )
+        stats = await stats_cursor.to_list(1)
+
+        return ORJSONResponse(
+            {
+                "total_items": stats[0]["total_items"] if stats else 0,
+                "total_quantity": stats[0]["total_quantity"] if stats else 0,
+            }
+        )
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
@@ -100,25 +140,28 @@ Args:
     item_id (str): The ID of the item to retrieve.
 
 Returns:
-    An `Inventory` object representing the inventory item.
+    The inventory document with `_id` rendered as a string.
 
 Raises:
+    InvalidIdError: If the item ID is not a valid ObjectId.
     NotFoundError: If the item with the specified ID is not found.
-    InternalServerError: 
+    InternalServerError: If an error occurs while retrieving the inventory item.
 """
 
 
-@router.get("/inventory/{item_id}", response_model=Inventory)
-async def get_item(item_id: str) -> Inventory:
+@router.get("/inventory/{item_id}", response_model=None)
+async def get_item(object_id: ObjectId = Depends(get_object_id)) -> ORJSONResponse:
     try:
-        item = await inventory_collection.find_one({"_id": item_id})
-        if item:
-            return item
-        else:
-            raise error_handler.handle_not_found_error("Item")
-    except Exception as e:
+        item = await inventory_collection.find_one({"_id": object_id})
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
+    if item:
+        item["_id"] = str(item["_id"])
+        return ORJSONResponse(item)
+    else:
+        raise error_handler.handle_not_found_error("Item")
+
 
 """
 Add an inventory item.
@@ -130,19 +173,33 @@ Returns:
     The added inventory item.
 
 Raises:
+    ValidationError: If the request body is not a valid inventory item.
+    ConflictError: If a product with the same name already exists.
     InternalServerError: If an error occurs while adding the inventory item.
 """
 
 
-@router.post("/inventory", response_model=Inventory)
-async def add_inventory(item: InventoryCreate) -> Inventory:
+@router.post(
+    "/inventory",
+    response_model=None,
+    openapi_extra=msgspec_body_openapi(InventoryCreate),
+)
+async def add_inventory(
+    item: InventoryCreate = Depends(msgspec_body(InventoryCreate)),
+) -> Response:
+    payload = msgspec.structs.asdict(item)
     try:
-        result = await inventory_collection.insert_one(item.model_dump())
-        if result.inserted_id:
-            return Inventory(**item.model_dump(), _id=str(result.inserted_id))
-        else:
-            raise error_handler.handle_internal_server_error()
-    except Exception as e:
+        result = await inventory_collection.insert_one(payload)
+    except DuplicateKeyError:
+        raise error_handler.handle_conflict_error("Product")
+    except PyMongoError:
+        raise error_handler.handle_internal_server_error()
+
+    if result.inserted_id:
+        # insert_one stored the ObjectId on the payload; reuse it as the response
+        payload["_id"] = str(result.inserted_id)
+        return Response(content=encoder.encode(payload), media_type="application/json")
+    else:
         raise error_handler.handle_internal_server_error()
 
 
@@ -157,26 +214,38 @@ Returns:
     A dictionary with a message indicating the success of the update.
 
 Raises:
+    ValidationError: If the request body is not a valid inventory update.
+    InvalidIdError: If the item ID is not a valid ObjectId.
     NotFoundError: If the item with the specified ID is not found.
+    ConflictError: If the update renames the item to an existing product.
     InternalServerError: If an error occurs while updating the inventory item.
 """
 
 
-@router.put("/inventory/{item_id}", response_model=dict)
-async def update_inventory(item_id: str, updated_item: InventoryUpdate) -> dict:
+@router.put(
+    "/inventory/{item_id}",
+    response_model=dict,
+    openapi_extra=msgspec_body_openapi(InventoryUpdate),
+)
+async def update_inventory(
+    object_id: ObjectId = Depends(get_object_id),
+    updated_item: InventoryUpdate = Depends(msgspec_body(InventoryUpdate)),
+) -> dict:
     try:
-        object_id = ObjectId(item_id)
+        # UNSET fields are omitted, mirroring a partial update
         result = await inventory_collection.update_one(
-            {"_id": object_id}, {"$set": updated_item.dict(exclude_unset=True)}
+            {"_id": object_id}, {"$set": msgspec.to_builtins(updated_item)}
         )
-
-        if result.modified_count > 0:
-            return {"message": "Item updated successfully"}
-        else:
-            raise error_handler.handle_not_found_error("Item")
-    except Exception as e:
+    except DuplicateKeyError:
+        raise error_handler.handle_conflict_error("Product")
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
+    if result.modified_count > 0:
+        return {"message": "Item updated successfully"}
+    else:
+        raise error_handler.handle_not_found_error("Item")
+
 
 """
 Delete an inventory item with the specified item ID.
@@ -188,20 +257,20 @@ Returns:
     A dictionary with a message indicating the success of the deletion.
 
 Raises:
+    InvalidIdError: If the item ID is not a valid ObjectId.
     NotFoundError: If the item with the specified ID is not found.
     InternalServerError: If an error occurs while deleting the inventory item.
 """
 
 
 @router.delete("/inventory/{item_id}", response_model=dict)
-async def delete_inventory(item_id: str) -> dict:
+async def delete_inventory(object_id: ObjectId = Depends(get_object_id)) -> dict:
     try:
-        object_id = ObjectId(item_id)
         result = await inventory_collection.delete_one({"_id": object_id})
-
-        if result.deleted_count > 0:
-            return {"message": "Item deleted successfully"}
-        else:
-            raise error_handler.handle_not_found_error("Item")
-    except Exception as e:
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
+
+    if result.deleted_count > 0:
+        return {"message": "Item deleted successfully"}
+    else:
+        raise error_handler.handle_not_found_error("Item")
@@ -1,34 +1,43 @@
-import logging
 from datetime import datetime
-from typing import List
 
-from fastapi import APIRouter, HTTPException, Path
+import msgspec
+from async_lru import alru_cache
+from fastapi import APIRouter, Depends, Path, Response
+from fastapi.responses import ORJSONResponse
+from pymongo.errors import PyMongoError
 
 from ..models.Sales import *
-from ..utils.database import sales_collection, inventory_collection
+from ..utils.database import sales_collection
 from ..utils.error_handling import ErrorHandling
-
-logger = logging.getLogger(__name__)
+from ..utils.request_body import msgspec_body, msgspec_body_openapi
+from ..utils.sale_writer import sale_writer
 
 router = APIRouter()
 error_handler = ErrorHandling()
 
+encoder = msgspec.json.Encoder()
+
+sale_projection = {"_id": 0, **{field: 1 for field in Sale.__struct_fields__}}
+
 """
 Get the sales data.
 
 Returns:
-    A list of `Sale` objects representing the sales data.
+    A list of sale documents projected to the `Sale` fields.
 
 Raises:
     InternalServerError: If an error occurs while retrieving the sales data.
 """
 
 
-@router.get("/sales", response_model=List[Sale])
-async def get_sales() -> List[Sale]:
+@router.get("/sales", response_model=None)
+async def get_sales() -> ORJSONResponse:
     try:
-        return await sales_collection.find().to_list(length=100)
-    except Exception as e:
+        sales_cursor = await sales_collection.aggregate(
+            [{"$limit": 100}, {"$project": sale_projection}]
+        )
+        return ORJSONResponse(await sales_cursor.to_list(None))
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
@@ -43,26 +52,31 @@ Raises:
 """
 
 
-@router.get("/sales/analyze", response_model=dict)
-async def analyze_sales() -> dict:
+@router.get("/sales/analyze", response_model=None)
+async def analyze_sales() -> ORJSONResponse:
     try:
-        total_quantity = await sales_collection.aggregate(
-            [{"$group": {"_id": None, "total_quantity": {"$sum": "$quantity"}}}]
-        ).to_list(1)
-
-        average_unit_price = await sales_collection.aggregate(
-            [{"$group": {"_id": None, "average_unit_price": {"$avg": "$unit_price"}}}]
-        ).to_list(1)
-
-        return {
-            "total_quantity": total_quantity[0]["total_quantity"]
-            if total_quantity
-            else 0,
-            "average_unit_price": average_unit_price[0]["average_unit_price"]
-            if average_unit_price
-            else 0,
-        }
-    except Exception as e:
+        analysis_cursor = await sales_collection.aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": None,
+                        "total_quantity": {"$sum": "$quantity"},
+                        "average_unit_price": {"$avg": "$unit_price"},
+                    }
+                }
+            ]
+        )
+        analysis = await analysis_cursor.to_list(1)
+
+        return ORJSONResponse(
+            {
+                "total_quantity": analysis[0]["total_quantity"] if analysis else 0,
+                "average_unit_price": analysis[0]["average_unit_price"]
+                if analysis
+                else 0,
+            }
+        )
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
@@ -77,23 +91,41 @@ Raises:
 """
 
 
-@router.get("/sales/total_revenue_by_category", response_model=dict)
-async def total_revenue_by_category() -> dict:
+@router.get("/sales/total_revenue_by_category", response_model=None)
+async def total_revenue_by_category() -> ORJSONResponse:
     try:
         # Group by product_line and calculate total revenue for each category
         pipeline = [
             {"$group": {"_id": "$product_line", "total_revenue": {"$sum": "$total"}}}
         ]
 
-        total_revenue_cursor = sales_collection.aggregate(pipeline)
+        total_revenue_cursor = await sales_collection.aggregate(pipeline)
 
         total_revenue_by_category = await total_revenue_cursor.to_list(None)
 
-        return {"total_revenue_by_category": total_revenue_by_category}
-    except Exception as e:
+        return ORJSONResponse({"total_revenue_by_category": total_revenue_by_category})
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
+"""
+Fetch the distinct product lines, cached for a minute.
+
+Product lines rarely change, so the `distinct` query is served from
+memory; `add_new_sale` clears the cache when a sale introduces a new
+product line. The cache is per process: with several uvicorn workers,
+the others keep serving their cached list until its TTL expires.
+
+Returns:
+    A list of the product lines present in the sales collection.
+"""
+
+
+@alru_cache(maxsize=1, ttl=60)
+async def fetch_categories() -> list:
+    return await sales_collection.distinct("product_line")
+
+
 """
 Get the categories of sales.
 
@@ -105,12 +137,12 @@ Raises:
 """
 
 
-@router.get("/sales/categories", response_model=dict)
-async def get_categories() -> dict:
+@router.get("/sales/categories", response_model=None)
+async def get_categories() -> ORJSONResponse:
     try:
-        categories = await sales_collection.distinct("product_line")
-        return {"categories": categories}
-    except Exception as e:
+        categories = await fetch_categories()
+        return ORJSONResponse({"categories": categories})
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
@@ -125,21 +157,23 @@ Raises:
 """
 
 
-@router.get("/sales/total_sales", response_model=dict)
-async def total_sales() -> dict:
+@router.get("/sales/total_sales", response_model=None)
+async def total_sales() -> ORJSONResponse:
     try:
-        total_sales_cursor = sales_collection.aggregate(
+        total_sales_cursor = await sales_collection.aggregate(
             [{"$group": {"_id": None, "total_sales": {"$sum": "$total"}}}]
         )
 
         total_sales_result = await total_sales_cursor.to_list(1)
 
-        return {
-            "total_sales": total_sales_result[0]["total_sales"]
-            if total_sales_result
-            else 0
-        }
-    except Exception as e:
+        return ORJSONResponse(
+            {
+                "total_sales": total_sales_result[0]["total_sales"]
+                if total_sales_result
+                else 0
+            }
+        )
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
@@ -154,21 +188,23 @@ Raises:
 """
 
 
-@router.get("/sales/total_revenue", response_model=dict)
-async def total_revenue() -> dict:
+@router.get("/sales/total_revenue", response_model=None)
+async def total_revenue() -> ORJSONResponse:
     try:
-        total_revenue_cursor = sales_collection.aggregate(
+        total_revenue_cursor = await sales_collection.aggregate(
             [{"$group": {"_id": None, "total_revenue": {"$sum": "$total"}}}]
         )
 
         total_revenue_result = await total_revenue_cursor.to_list(1)
 
-        return {
-            "total_revenue": total_revenue_result[0]["total_revenue"]
-            if total_revenue_result
-            else 0
-        }
-    except Exception as e:
+        return ORJSONResponse(
+            {
+                "total_revenue": total_revenue_result[0]["total_revenue"]
+                if total_revenue_result
+                else 0
+            }
+        )
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
@@ -179,23 +215,27 @@ Args:
     product_line (str): The product line to filter the sales data.
 
 Returns:
-    A list of `SalesResponseModel` objects representing the sales data for the specified product line.
+    A list of sale documents for the specified product line, projected to the `Sale` fields.
 
 Raises:
     InternalServerError: If an error occurs while retrieving the sales data.
 """
 
 
-@router.get("/sales/{product_line}", response_model=List[SalesResponseModel])
+@router.get("/sales/{product_line}", response_model=None)
 async def get_sales_for_product(
     product_line: str = Path(..., title="Product Line")
-) -> List[SalesResponseModel]:
+) -> ORJSONResponse:
     try:
-        sales_for_product = await sales_collection.find(
-            {"product_line": product_line}
-        ).to_list(length=100)
-        return sales_for_product
-    except Exception as e:
+        sales_for_product_cursor = await sales_collection.aggregate(
+            [
+                {"$match": {"product_line": product_line}},
+                {"$limit": 100},
+                {"$project": sale_projection},
+            ]
+        )
+        return ORJSONResponse(await sales_for_product_cursor.to_list(None))
+    except PyMongoError:
         raise error_handler.handle_internal_server_error()
 
 
@@ -209,46 +249,38 @@ Returns:
     The added sale object.
 
 Raises:
+    ValidationError: If the request body is not a valid sale.
     NotFoundError: If the product line is not found in the inventory.
     HTTPException: If there is insufficient quantity in the inventory.
-    HTTPException: If the sale fails to be added to the database.
+    InternalServerError: If the sale fails to be added to the database.
 """
 
 
-@router.post("/sales/new_sale", response_model=Sale)
-async def add_new_sale(sale: Sale) -> Sale:
-    # Add current time and date
-    sale.date = datetime.now().strftime("%m/%d/%Y")
-    sale.time = datetime.now().strftime("%H:%M:%S")
-
-    product_in_inventory = await inventory_collection.find_one(
-        {"Products": sale.product_line}
-    )
-
-    if not product_in_inventory:
-        raise error_handler.handle_not_found_error("Product")
-
-    # Check if quantity is available in inventory
-    if product_in_inventory["Quantity"] < sale.quantity:
-        raise HTTPException(
-            status_code=404, detail="Insufficient quantity in inventory"
-        )
+@router.post(
+    "/sales/new_sale", response_model=None, openapi_extra=msgspec_body_openapi(Sale)
+)
+async def add_new_sale(sale: Sale = Depends(msgspec_body(Sale))) -> Response:
+    # Add current time and date from a single clock read
+    now = datetime.now()
+    sale.date = now.strftime("%m/%d/%Y")
+    sale.time = now.strftime("%H:%M:%S")
 
     # Calculate total and tax_5_percent
     sale.total = sale.unit_price * sale.quantity * 0.95
     sale.tax_5_percent = sale.unit_price * sale.quantity * 0.05
 
-    # Update inventory quantity
-    updated_quantity = product_in_inventory["Quantity"] - sale.quantity
-    await inventory_collection.update_one(
-        {"Products": sale.product_line},
-        {"$set": {"Quantity": updated_quantity}},
-    )
+    # Concurrent sales are coalesced into one batched transaction
+    try:
+        await sale_writer.submit(msgspec.structs.asdict(sale))
+    except PyMongoError:
+        raise error_handler.handle_internal_server_error()
 
-    # Insert the new sale into the database
-    result = await sales_collection.insert_one(sale.dict())
+    # Only the first sale of a product line changes the categories
+    try:
+        if sale.product_line not in await fetch_categories():
+            fetch_categories.cache_clear()
+    except PyMongoError:
+        # The sale is recorded; just make sure no stale list is served
+        fetch_categories.cache_clear()
 
-    if result.inserted_id:
-        return Sale(**sale.dict())
-    else:
-        raise HTTPException(status_code=500, detail="Failed to add sale")
+    return Response(content=encoder.encode(sale), media_type="application/json")
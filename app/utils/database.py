@@ -1,11 +1,23 @@
-import motor.motor_asyncio
 from bson import ObjectId
 from decouple import config
-from pymongo import ReturnDocument
+from pymongo import AsyncMongoClient, ReturnDocument
 
-client = motor.motor_asyncio.AsyncIOMotorClient(config("MONGODB_URL"), w=2)
+client = AsyncMongoClient(
+    config("MONGODB_URL"),
+    w=2,
+    maxPoolSize=config("MONGODB_MAX_POOL_SIZE", default=50, cast=int),
+    minPoolSize=config("MONGODB_MIN_POOL_SIZE", default=10, cast=int),
+)
 db = client["forsit"]
 
 # Access collections
 inventory_collection = db["inventory"]
 sales_collection = db["sales"]
+
+
+async def ensure_indexes() -> None:
+    # Cover the lookups and filters issued by the inventory and sales routes
+    await inventory_collection.create_index("Products", unique=True)
+    await inventory_collection.create_index("Quantity")
+    await sales_collection.create_index("product_line")
+    await sales_collection.create_index("date")
@@ -15,6 +15,26 @@ class ErrorHandling:
             status_code=status.HTTP_404_NOT_FOUND, detail=f"{resource_name} not found"
         )
 
+    @staticmethod
+    def handle_conflict_error(resource_name: str):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{resource_name} already exists",
+        )
+
+    @staticmethod
+    def handle_invalid_id_error(resource_name: str):
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {resource_name} ID",
+        )
+
+    @staticmethod
+    def handle_validation_error(detail: str):
+        return HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail
+        )
+
 
 class InventoryErrorHandler:
     @staticmethod
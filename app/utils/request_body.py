@@ -0,0 +1,64 @@
+from typing import Any, Callable
+
+import msgspec
+from fastapi import Request
+
+from .error_handling import ErrorHandling
+
+error_handler = ErrorHandling()
+
+"""
+Build a dependency that decodes the JSON request body into a `msgspec.Struct`.
+
+The raw body is parsed and validated in a single pass by a `msgspec.json.Decoder`
+created once per struct type, bypassing FastAPI's Pydantic body handling.
+`strict=False` keeps the lax coercion (e.g. "5" for an int) clients relied on.
+
+Args:
+    struct_type (type): The `msgspec.Struct` type to decode the body into.
+
+Returns:
+    A dependency returning the decoded struct.
+
+Raises:
+    ValidationError: If the body is not valid JSON for `struct_type`.
+"""
+
+
+def msgspec_body(struct_type: type) -> Callable:
+    decoder = msgspec.json.Decoder(struct_type, strict=False)
+
+    async def decode_body(request: Request) -> Any:
+        try:
+            return decoder.decode(await request.body())
+        except msgspec.DecodeError as e:
+            raise error_handler.handle_validation_error(str(e))
+
+    return decode_body
+
+
+"""
+Describe a `msgspec.Struct` request body for the OpenAPI schema.
+
+FastAPI cannot see bodies read through `msgspec_body`, so routes pass this as
+`openapi_extra` to keep the body documented at /home.
+
+Args:
+    struct_type (type): The `msgspec.Struct` type of the request body.
+
+Returns:
+    The `openapi_extra` mapping describing the JSON request body.
+"""
+
+
+def msgspec_body_openapi(struct_type: type) -> dict:
+    _, components = msgspec.json.schema_components(
+        [struct_type], ref_template="#/components/schemas/{name}"
+    )
+    schema = components[struct_type.__name__]
+    return {
+        "requestBody": {
+            "content": {"application/json": {"schema": schema}},
+            "required": True,
+        }
+    }
@@ -0,0 +1,184 @@
+import asyncio
+from typing import Optional
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+from .database import client, inventory_collection, sales_collection
+from .error_handling import ErrorHandling
+
+error_handler = ErrorHandling()
+
+
+class InsufficientBatchStock(Exception):
+    pass
+
+
+"""
+Coalesce concurrent sales into batched writes.
+
+Sales submitted within `max_delay` seconds of each other are written in one
+transaction: a single unordered `bulk_write` reserves the stock for the whole
+batch and a single unordered `insert_many` records the sales. If any sale in
+the batch cannot be satisfied, or the batch hits a database error, the
+transaction is aborted and the batch is bisected, so a single failing sale
+costs O(log n) extra transactions and still gets its own error. Connection
+failures are not replayed; they fail every sale in the batch.
+
+Attributes:
+    max_batch_size (int): The maximum number of sales written per batch.
+    max_delay (float): How long, in seconds, to wait for more sales to join a batch.
+"""
+
+
+class SaleWriter:
+    def __init__(self, max_batch_size: int = 100, max_delay: float = 0.001) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # The sentinel lets the writer flush everything queued before it
+        self._stopping = True
+        await self._queue.put(None)
+        if self._task:
+            await self._task
+
+    async def submit(self, sale: dict) -> None:
+        # Nothing would ever resolve the future without a running writer
+        if self._stopping or self._task is None or self._task.done():
+            raise RuntimeError("SaleWriter is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((sale, future))
+        await future
+
+    async def _run(self) -> None:
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                return
+
+            batch = [entry]
+            await asyncio.sleep(self.max_delay)
+
+            stopping = False
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                entry = self._queue.get_nowait()
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: list) -> None:
+        if len(batch) == 1:
+            sale, future = batch[0]
+            try:
+                await self._write_one(sale)
+            except Exception as e:
+                self._resolve(future, e)
+            else:
+                self._resolve(future)
+            return
+
+        try:
+            await self._write_batch([sale for sale, _ in batch])
+        except ConnectionFailure as e:
+            # Replaying against an unreachable server would only repeat the timeout
+            self._resolve_all(batch, e)
+        except (InsufficientBatchStock, PyMongoError):
+            middle = len(batch) // 2
+            await self._flush(batch[:middle])
+            await self._flush(batch[middle:])
+        except Exception as e:
+            self._resolve_all(batch, e)
+        else:
+            self._resolve_all(batch)
+
+    async def _write_batch(self, sales: list) -> None:
+        async def reserve_and_record(session) -> None:
+            result = await inventory_collection.bulk_write(
+                [
+                    UpdateOne(
+                        {
+                            "Products": sale["product_line"],
+                            "Quantity": {"$gte": sale["quantity"]},
+                        },
+                        {"$inc": {"Quantity": -sale["quantity"]}},
+                    )
+                    for sale in sales
+                ],
+                ordered=False,
+                session=session,
+            )
+
+            # Unmatched updates do not say which sale failed; abort and bisect
+            if result.matched_count < len(sales):
+                raise InsufficientBatchStock()
+
+            await sales_collection.insert_many(sales, ordered=False, session=session)
+
+        # with_transaction retries write conflicts with sales committed by
+        # other workers (TransientTransactionError / unknown commit result)
+        async with client.start_session() as session:
+            await session.with_transaction(reserve_and_record)
+
+    async def _write_one(self, sale: dict) -> None:
+        async def reserve_and_record(session) -> None:
+            # Atomically reserve the quantity; the filter rejects insufficient stock
+            product_in_inventory = await inventory_collection.find_one_and_update(
+                {
+                    "Products": sale["product_line"],
+                    "Quantity": {"$gte": sale["quantity"]},
+                },
+                {"$inc": {"Quantity": -sale["quantity"]}},
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+
+            if not product_in_inventory:
+                # Only on failure: tell a missing product apart from low stock
+                if await inventory_collection.find_one(
+                    {"Products": sale["product_line"]}, session=session
+                ):
+                    raise HTTPException(
+                        status_code=404, detail="Insufficient quantity in inventory"
+                    )
+                raise error_handler.handle_not_found_error("Product")
+
+            await sales_collection.insert_one(sale, session=session)
+
+        # Reserve the stock and record the sale in one transaction, so a failed
+        # insert never leaves the inventory decremented; with_transaction
+        # retries write conflicts with concurrent sales from other workers
+        async with client.start_session() as session:
+            await session.with_transaction(reserve_and_record)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, error: Optional[Exception] = None) -> None:
+        # The request may have been cancelled while its sale was in flight
+        if future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+    @classmethod
+    def _resolve_all(cls, batch: list, error: Optional[Exception] = None) -> None:
+        for _, future in batch:
+            cls._resolve(future, error)
+
+
+sale_writer = SaleWriter()
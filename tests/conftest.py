@@ -0,0 +1,5 @@
+import os
+
+# app.utils.database builds its client at import time; it does not connect
+# until the first operation, so any well-formed URL is enough for the tests
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
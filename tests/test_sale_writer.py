@@ -0,0 +1,196 @@
+import asyncio
+import copy
+
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from app.utils import sale_writer as sale_writer_module
+from app.utils.sale_writer import SaleWriter
+
+
+class StubSession:
+    def __init__(self, client):
+        self.client = client
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def with_transaction(self, callback):
+        # Roll the stubbed collections back when the callback fails
+        stock = copy.deepcopy(self.client.inventory.stock)
+        sales = list(self.client.sales.documents)
+        try:
+            return await callback(self)
+        except Exception:
+            self.client.inventory.stock = stock
+            self.client.sales.documents = sales
+            raise
+
+
+class StubClient:
+    def __init__(self, inventory, sales):
+        self.inventory = inventory
+        self.sales = sales
+
+    def start_session(self):
+        return StubSession(self)
+
+
+class StubBulkWriteResult:
+    def __init__(self, matched_count):
+        self.matched_count = matched_count
+
+
+class StubInventory:
+    def __init__(self, stock, bulk_write_error=None):
+        self.stock = dict(stock)
+        self.bulk_write_error = bulk_write_error
+        self.bulk_write_sizes = []
+
+    def _reserve(self, query, update):
+        product = query["Products"]
+        quantity = query["Quantity"]["$gte"]
+        if self.stock.get(product, -1) < quantity:
+            return None
+        self.stock[product] += update["$inc"]["Quantity"]
+        return {"Products": product, "Quantity": self.stock[product]}
+
+    async def bulk_write(self, requests, ordered, session):
+        self.bulk_write_sizes.append(len(requests))
+        if self.bulk_write_error:
+            raise self.bulk_write_error
+        matched = [self._reserve(query, update) for query, update in requests]
+        return StubBulkWriteResult(sum(doc is not None for doc in matched))
+
+    async def find_one_and_update(self, query, update, return_document, session):
+        return self._reserve(query, update)
+
+    async def find_one(self, query, session):
+        product = query["Products"]
+        if product in self.stock:
+            return {"Products": product, "Quantity": self.stock[product]}
+        return None
+
+
+class StubSales:
+    def __init__(self):
+        self.documents = []
+
+    async def insert_many(self, documents, ordered, session):
+        self.documents.extend(documents)
+
+    async def insert_one(self, document, session):
+        self.documents.append(document)
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    def install(stock, bulk_write_error=None):
+        inventory = StubInventory(stock, bulk_write_error)
+        sales = StubSales()
+        monkeypatch.setattr(sale_writer_module, "inventory_collection", inventory)
+        monkeypatch.setattr(sale_writer_module, "sales_collection", sales)
+        monkeypatch.setattr(sale_writer_module, "client", StubClient(inventory, sales))
+        monkeypatch.setattr(
+            sale_writer_module, "UpdateOne", lambda query, update: (query, update)
+        )
+        return inventory, sales
+
+    return install
+
+
+def make_sale(product_line, quantity):
+    return {"product_line": product_line, "quantity": quantity}
+
+
+async def submit_all(sales):
+    writer = SaleWriter(max_delay=0.01)
+    writer.start()
+    try:
+        return await asyncio.gather(
+            *[writer.submit(sale) for sale in sales], return_exceptions=True
+        )
+    finally:
+        await writer.stop()
+
+
+def test_batch_success(stubs):
+    inventory, sales = stubs({"Food": 10, "Toys": 5})
+
+    results = asyncio.run(
+        submit_all([make_sale("Food", 3), make_sale("Food", 2), make_sale("Toys", 5)])
+    )
+
+    assert results == [None, None, None]
+    assert inventory.bulk_write_sizes == [3]
+    assert inventory.stock == {"Food": 5, "Toys": 0}
+    assert len(sales.documents) == 3
+
+
+def test_replay_on_insufficient_stock(stubs):
+    inventory, sales = stubs({"Food": 5})
+
+    results = asyncio.run(
+        submit_all(
+            [
+                make_sale("Food", 2),
+                make_sale("Food", 2),
+                make_sale("Food", 2),
+                make_sale("Unknown", 1),
+            ]
+        )
+    )
+
+    assert results[:2] == [None, None]
+    assert isinstance(results[2], HTTPException)
+    assert results[2].detail == "Insufficient quantity in inventory"
+    assert isinstance(results[3], HTTPException)
+    assert results[3].detail == "Product not found"
+    # The failed batch is bisected rather than replayed sale by sale
+    assert inventory.bulk_write_sizes == [4, 2, 2]
+    assert inventory.stock == {"Food": 1}
+    assert len(sales.documents) == 2
+
+
+def test_replay_on_database_error(stubs):
+    inventory, sales = stubs({"Food": 10}, bulk_write_error=OperationFailure("boom"))
+
+    results = asyncio.run(submit_all([make_sale("Food", 1), make_sale("Food", 2)]))
+
+    assert results == [None, None]
+    assert inventory.stock == {"Food": 7}
+    assert len(sales.documents) == 2
+
+
+def test_connection_failure_fans_out(stubs):
+    error = AutoReconnect("unreachable")
+    inventory, sales = stubs({"Food": 10}, bulk_write_error=error)
+
+    results = asyncio.run(
+        submit_all([make_sale("Food", 1), make_sale("Food", 1), make_sale("Food", 1)])
+    )
+
+    assert results == [error, error, error]
+    assert inventory.bulk_write_sizes == [3]
+    assert inventory.stock == {"Food": 10}
+    assert sales.documents == []
+
+
+def test_submit_requires_running_writer(stubs):
+    stubs({"Food": 10})
+
+    async def submit_outside_lifecycle():
+        writer = SaleWriter()
+        with pytest.raises(RuntimeError):
+            await writer.submit(make_sale("Food", 1))
+
+        writer.start()
+        await writer.stop()
+        with pytest.raises(RuntimeError):
+            await writer.submit(make_sale("Food", 1))
+
+    asyncio.run(submit_outside_lifecycle())